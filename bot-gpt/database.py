@@ -3,22 +3,59 @@ Database models and setup using SQLAlchemy with SQLite.
 Defines three tables: users, conversations, and messages.
 """
 
+import logging
 import uuid
 from datetime import datetime
-from typing import Optional, List
-from sqlalchemy import create_engine, Column, String, Integer, Text, DateTime, ForeignKey, JSON
+from typing import Optional, List, Tuple
+from sqlalchemy import create_engine, event, inspect, Column, Index, String, Integer, Text, DateTime, ForeignKey, JSON
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.schema import CreateIndex, CreateTable
 from sqlalchemy.orm import sessionmaker, relationship, Session
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
 
 # SQLite database file
 DATABASE_URL = "sqlite:///./bot_gpt.db"
 
-# Create engine with SQLite
+# Create engine with SQLite. The pool arguments spell out SQLAlchemy's existing
+# default for file-backed SQLite (QueuePool, 5 connections + 10 overflow)
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
+    connect_args={"check_same_thread": False},  # Needed for SQLite
+    poolclass=QueuePool,
+    pool_size=5,
+    max_overflow=10
 )
 
+
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Tune every new SQLite connection for concurrent reads and writes.
+    WAL lets readers run alongside a writer, and NORMAL sync avoids an
+    fsync on every commit (still safe in WAL mode).
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA cache_size=-16000")  # ~16 MiB page cache
+    cursor.execute("PRAGMA busy_timeout=30000")  # Wait 30s on locks instead of failing
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MiB memory-mapped I/O
+    cursor.close()
+
+
+@event.listens_for(engine, "close")
+def optimize_on_close(dbapi_connection, connection_record):
+    """Let SQLite refresh query planner statistics before a connection closes."""
+    try:
+        dbapi_connection.execute("PRAGMA optimize")
+    except Exception as e:
+        logger.warning("PRAGMA optimize failed: %s", e)
+
+
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -52,14 +89,26 @@ class Conversation(Base):
     
     # Relationships
     user = relationship("User", back_populates="conversations")
-    messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
+    messages = relationship(
+        "Message",
+        back_populates="conversation",
+        cascade="all, delete-orphan",
+        order_by="[Message.timestamp, Message.id]"
+    )
+    
+    # Serves "WHERE user_id = ? ORDER BY updated_at DESC" as an index range scan
+    __table_args__ = (
+        Index("ix_conv_user_updated", "user_id", "updated_at"),
+    )
 
 
 class Message(Base):
     """Message model - stores individual messages in a conversation."""
     __tablename__ = "messages"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    # Integer rowid key: messages need no globally unique ID, and a small key
+    # keeps the conversation/timestamp index compact
+    id = Column(Integer, primary_key=True, autoincrement=True)
     conversation_id = Column(String(36), ForeignKey("conversations.id"), nullable=False)
     role = Column(String(20), nullable=False)  # "user" or "assistant"
     content = Column(Text, nullable=False)
@@ -68,20 +117,69 @@ class Message(Base):
     
     # Relationship
     conversation = relationship("Conversation", back_populates="messages")
+    
+    # Serves "WHERE conversation_id = ? ORDER BY timestamp" without a sort step
+    __table_args__ = (
+        Index("ix_messages_conv_ts", "conversation_id", "timestamp"),
+    )
+
+
+def migrate_message_ids():
+    """
+    Rebuild a messages table created with UUID string IDs so it uses integer IDs.
+    Existing messages are copied in timestamp order and get new sequential IDs.
+    """
+    columns = {col["name"]: col for col in inspect(engine).get_columns("messages")}
+    if isinstance(columns["id"]["type"], Integer):
+        return
+    
+    logger.info("Migrating messages table to integer IDs")
+    # pysqlite autocommits DDL, so drive the transaction by hand on the raw
+    # connection to make the whole rebuild atomic
+    raw = engine.raw_connection()
+    dbapi_conn = raw.driver_connection
+    isolation_level = dbapi_conn.isolation_level
+    dbapi_conn.isolation_level = None
+    try:
+        dbapi_conn.execute("BEGIN")
+        dbapi_conn.execute("ALTER TABLE messages RENAME TO messages_old")
+        # Index names are global in SQLite, so free them for the new table
+        for index in Message.__table__.indexes:
+            dbapi_conn.execute(f"DROP INDEX IF EXISTS {index.name}")
+        for statement in [CreateTable(Message.__table__)] + [
+            CreateIndex(index) for index in Message.__table__.indexes
+        ]:
+            dbapi_conn.execute(str(statement.compile(dialect=engine.dialect)))
+        dbapi_conn.execute(
+            "INSERT INTO messages (conversation_id, role, content, tokens_used, timestamp) "
+            "SELECT conversation_id, role, content, tokens_used, timestamp "
+            "FROM messages_old ORDER BY timestamp"
+        )
+        dbapi_conn.execute("DROP TABLE messages_old")
+        dbapi_conn.execute("COMMIT")
+    except Exception:
+        dbapi_conn.execute("ROLLBACK")
+        raise
+    finally:
+        dbapi_conn.isolation_level = isolation_level
+        raw.close()
 
 
 def create_tables():
-    """Create all database tables."""
+    """Create all database tables and any indexes missing from existing tables."""
     Base.metadata.create_all(bind=engine)
+    migrate_message_ids()
+    # create_all skips tables that already exist, so add newer indexes explicitly
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 
-def get_db() -> Session:
-    """Get database session."""
-    db = SessionLocal()
-    try:
-        return db
-    finally:
-        pass
+def analyze_database():
+    """Gather fresh statistics for the query planner (run once at shutdown)."""
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    logger.info("Database statistics updated")
 
 
 # Database helper functions
@@ -90,13 +188,18 @@ def get_user_by_email(db: Session, email: str) -> Optional[User]:
     return db.query(User).filter(User.email == email).first()
 
 
-def create_user(db: Session, email: str) -> User:
-    """Create a new user."""
-    user = User(email=email)
-    db.add(user)
+def get_or_create_user(db: Session, email: str) -> User:
+    """
+    Get a user by email, creating it if missing.
+    Uses INSERT ... ON CONFLICT DO NOTHING so concurrent callers never
+    race on the unique email index.
+    """
+    db.execute(
+        sqlite_insert(User).values(email=email)
+        .on_conflict_do_nothing(index_elements=["email"])
+    )
     db.commit()
-    db.refresh(user)
-    return user
+    return get_user_by_email(db, email)
 
 
 def get_conversation(db: Session, conversation_id: str) -> Optional[Conversation]:
@@ -104,9 +207,14 @@ def get_conversation(db: Session, conversation_id: str) -> Optional[Conversation
     return db.query(Conversation).filter(Conversation.id == conversation_id).first()
 
 
-def get_user_conversations(db: Session, user_id: int) -> List[Conversation]:
-    """Get all conversations for a user."""
-    return db.query(Conversation).filter(
+def get_user_conversation_summaries(db: Session, user_id: int) -> List[Tuple]:
+    """
+    Get (id, title, mode, updated_at) rows for a user's conversations.
+    Selects only these columns, so no ORM objects or messages are loaded.
+    """
+    return db.query(
+        Conversation.id, Conversation.title, Conversation.mode, Conversation.updated_at
+    ).filter(
         Conversation.user_id == user_id
     ).order_by(Conversation.updated_at.desc()).all()
 
@@ -143,35 +251,42 @@ def get_messages(db: Session, conversation_id: str, limit: Optional[int] = None)
     """Get messages for a conversation, optionally limited."""
     query = db.query(Message).filter(
         Message.conversation_id == conversation_id
-    ).order_by(Message.timestamp)
+    )
     
     if limit:
-        # Get last N messages
-        all_msgs = query.all()
-        return all_msgs[-limit:] if len(all_msgs) > limit else all_msgs
-    return query.all()
-
-
-def create_message(db: Session, conversation_id: str, role: str, content: str, tokens_used: int = 0) -> Message:
-    """Create a new message."""
-    msg = Message(
-        conversation_id=conversation_id,
-        role=role,
-        content=content,
-        tokens_used=tokens_used
-    )
-    db.add(msg)
+        # Get last N messages newest-first via the index, then restore chronological order.
+        # Messages saved in one transaction can share a timestamp, so id breaks ties.
+        rows = query.order_by(Message.timestamp.desc(), Message.id.desc()).limit(limit).all()
+        return list(reversed(rows))
+    return query.order_by(Message.timestamp, Message.id).all()
+
+
+def create_messages_bulk(db: Session, conversation_id: str, pairs: List[Tuple[str, str]]) -> List[Message]:
+    """
+    Create several messages in a single transaction.
+    Takes (role, content) pairs in chronological order and commits once.
+    Returns the messages detached, with the id and timestamp set by the flush.
+    """
+    msgs = [
+        Message(conversation_id=conversation_id, role=role, content=content, tokens_used=0)
+        for role, content in pairs
+    ]
+    db.add_all(msgs)
+    # Flush to get ids (rowid) and the Python-side timestamp default without re-selecting
+    db.flush()
     
-    # Update conversation timestamp
-    conv = get_conversation(db, conversation_id)
-    if conv:
-        conv.updated_at = datetime.utcnow()
+    # Update conversation timestamp with a single UPDATE (no SELECT first)
+    db.query(Conversation).filter(
+        Conversation.id == conversation_id
+    ).update({"updated_at": datetime.utcnow()}, synchronize_session=False)
     
+    # Detach so the commit does not expire the flushed values
+    for msg in msgs:
+        db.expunge(msg)
     db.commit()
-    db.refresh(msg)
-    return msg
+    return msgs
 
 
 # Initialize database on module load
 create_tables()
-print("Database initialized successfully!")
+logger.info("Database initialized successfully!")
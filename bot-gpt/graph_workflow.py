@@ -6,23 +6,35 @@ Implements a simple graph with three nodes:
 - save_response: Save to database
 """
 
-from typing import TypedDict, List, Dict, Optional, Annotated
+import logging
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional
 from langgraph.graph import StateGraph, START, END
 from sqlalchemy.orm import Session
 
-from database import get_messages, create_message, update_conversation_title, get_conversation
+from database import get_messages, create_messages_bulk, update_conversation_title, get_conversation
 from llm_service import generate_response_sync, clean_response
 
+logger = logging.getLogger(__name__)
+
 
 # Define the state that flows through the graph
-class ConversationState(TypedDict):
-    """State object that tracks the conversation flow."""
+@dataclass(slots=True)
+class ConversationState:
+    """
+    State object that tracks the conversation flow.
+    LangGraph builds a fresh instance from its channel values for each node;
+    nodes set fields on that instance and return it, and LangGraph reads
+    every field back out as the node's update.
+    """
     conversation_id: str
     user_message: str
-    messages: List[Dict]
-    current_response: Optional[str]
     db_session: Session
-    error: Optional[str]
+    messages: List[Dict] = field(default_factory=list)
+    current_response: Optional[str] = None
+    saved_user_msg: Optional[Dict] = None  # {"id", "timestamp"} of the stored user message
+    saved_ai_msg: Optional[Dict] = None  # {"id", "timestamp"} of the stored AI message
+    error: Optional[str] = None
 
 
 def process_message(state: ConversationState) -> ConversationState:
@@ -30,36 +42,30 @@ def process_message(state: ConversationState) -> ConversationState:
     Node 1: Load conversation history from database.
     Gets the last 10 messages for context.
     """
-    print(f"[process_message] Loading history for conversation: {state['conversation_id']}")
+    logger.debug("[process_message] Loading history for conversation: %s", state.conversation_id)
     
     try:
-        db = state["db_session"]
-        conversation_id = state["conversation_id"]
+        db = state.db_session
+        conversation_id = state.conversation_id
         
         # Get messages from database (last 10 for sliding window)
         db_messages = get_messages(db, conversation_id, limit=10)
         
         # Convert to simple dict format for LLM
-        messages = [
+        state.messages = [
             {"role": msg.role, "content": msg.content}
             for msg in db_messages
         ]
+        state.error = None
         
-        print(f"[process_message] Loaded {len(messages)} messages from history")
-        
-        return {
-            **state,
-            "messages": messages,
-            "error": None
-        }
+        logger.debug("[process_message] Loaded %d messages from history", len(state.messages))
         
     except Exception as e:
-        print(f"[process_message] Error: {e}")
-        return {
-            **state,
-            "messages": [],
-            "error": str(e)
-        }
+        logger.error("[process_message] Error: %s", e)
+        state.messages = []
+        state.error = str(e)
+    
+    return state
 
 
 def call_llm(state: ConversationState) -> ConversationState:
@@ -67,37 +73,31 @@ def call_llm(state: ConversationState) -> ConversationState:
     Node 2: Call GROQ API with context.
     Uses LangChain to generate a response.
     """
-    print(f"[call_llm] Generating response for: {state['user_message'][:50]}...")
+    logger.debug("[call_llm] Generating response for: %.50s...", state.user_message)
     
     # Skip if there was an error in previous node
-    if state.get("error"):
+    if state.error:
         return state
     
     try:
         # Call the LLM service
         response = generate_response_sync(
-            user_message=state["user_message"],
-            conversation_history=state["messages"]
+            user_message=state.user_message,
+            conversation_history=state.messages
         )
         
         # Clean up response by removing asterisks and markdown
-        response = clean_response(response)
-        
-        print(f"[call_llm] Generated response: {response[:50]}...")
+        state.current_response = clean_response(response)
+        state.error = None
         
-        return {
-            **state,
-            "current_response": response,
-            "error": None
-        }
+        logger.debug("[call_llm] Generated response: %.50s...", state.current_response)
         
     except Exception as e:
-        print(f"[call_llm] Error: {e}")
-        return {
-            **state,
-            "current_response": "Sorry, I encountered an error processing your request. Please try again.",
-            "error": str(e)
-        }
+        logger.error("[call_llm] Error: %s", e)
+        state.current_response = "Sorry, I encountered an error processing your request. Please try again."
+        state.error = str(e)
+    
+    return state
 
 
 def save_response(state: ConversationState) -> ConversationState:
@@ -105,52 +105,42 @@ def save_response(state: ConversationState) -> ConversationState:
     Node 3: Save both user message and AI response to database.
     Also updates the conversation title if it's the first message.
     """
-    print(f"[save_response] Saving messages to database")
+    logger.debug("[save_response] Saving messages to database")
     
     try:
-        db = state["db_session"]
-        conversation_id = state["conversation_id"]
+        db = state.db_session
+        conversation_id = state.conversation_id
         
-        # Save user message
-        user_msg = create_message(
+        # Save user message and AI response in one transaction
+        user_msg, ai_msg = create_messages_bulk(
             db=db,
             conversation_id=conversation_id,
-            role="user",
-            content=state["user_message"],
-            tokens_used=0
+            pairs=[
+                ("user", state.user_message),
+                ("assistant", state.current_response)
+            ]
         )
-        print(f"[save_response] Saved user message: {user_msg.id}")
-        
-        # Save AI response
-        ai_msg = create_message(
-            db=db,
-            conversation_id=conversation_id,
-            role="assistant",
-            content=state["current_response"],
-            tokens_used=0  # Token tracking placeholder
-        )
-        print(f"[save_response] Saved AI message: {ai_msg.id}")
+        state.saved_user_msg = {"id": user_msg.id, "timestamp": user_msg.timestamp}
+        state.saved_ai_msg = {"id": ai_msg.id, "timestamp": ai_msg.timestamp}
+        logger.debug("[save_response] Saved user message: %s", user_msg.id)
+        logger.debug("[save_response] Saved AI message: %s", ai_msg.id)
         
         # Update conversation title if first message
         conv = get_conversation(db, conversation_id)
         if conv and conv.title == "New Conversation":
-            title = state["user_message"][:30]
-            if len(state["user_message"]) > 30:
+            title = state.user_message[:30]
+            if len(state.user_message) > 30:
                 title += "..."
             update_conversation_title(db, conversation_id, title)
-            print(f"[save_response] Updated title to: {title}")
+            logger.debug("[save_response] Updated title to: %s", title)
         
-        return {
-            **state,
-            "error": None
-        }
+        state.error = None
         
     except Exception as e:
-        print(f"[save_response] Error: {e}")
-        return {
-            **state,
-            "error": str(e)
-        }
+        logger.error("[save_response] Error: %s", e)
+        state.error = str(e)
+    
+    return state
 
 
 def create_conversation_graph() -> StateGraph:
@@ -185,7 +175,7 @@ def run_conversation_workflow(
     conversation_id: str,
     user_message: str,
     skip_user_msg: bool = False
-) -> str:
+) -> Dict:
     """
     Run the complete conversation workflow.
     
@@ -196,30 +186,29 @@ def run_conversation_workflow(
         skip_user_msg: If True, skip saving the user message (already saved)
     
     Returns:
-        The AI response
+        Dict with the AI "response" text plus the saved "user_msg" and
+        "ai_msg" ({"id", "timestamp"}, or None if saving failed)
     """
-    print(f"\n{'='*50}")
-    print(f"Running conversation workflow")
-    print(f"Conversation: {conversation_id}")
-    print(f"Message: {user_message[:50]}...")
-    print(f"{'='*50}\n")
+    logger.info("Running conversation workflow for conversation: %s", conversation_id)
+    logger.debug("Message: %.50s...", user_message)
     
     # Create initial state
-    initial_state: ConversationState = {
-        "conversation_id": conversation_id,
-        "user_message": user_message,
-        "messages": [],
-        "current_response": None,
-        "db_session": db,
-        "error": None
-    }
+    initial_state = ConversationState(
+        conversation_id=conversation_id,
+        user_message=user_message,
+        db_session=db
+    )
     
-    # Run the workflow
+    # Run the workflow (LangGraph returns the final channel values as a dict)
     final_state = conversation_workflow.invoke(initial_state)
     
     if final_state.get("error"):
-        print(f"Workflow completed with error: {final_state['error']}")
+        logger.warning("Workflow completed with error: %s", final_state["error"])
     else:
-        print("Workflow completed successfully!")
+        logger.debug("Workflow completed successfully!")
     
-    return final_state.get("current_response", "Error generating response")
+    return {
+        "response": final_state.get("current_response") or "Error generating response",
+        "user_msg": final_state.get("saved_user_msg"),
+        "ai_msg": final_state.get("saved_ai_msg")
+    }
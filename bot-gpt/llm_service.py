@@ -1,9 +1,11 @@
 """
 LangChain + GROQ integration for LLM calls.
-Uses ChatGroq with ConversationBufferWindowMemory.
+Uses ChatGroq with a sliding window of recent messages as chat history.
 """
 
+import logging
 import os
+from functools import lru_cache
 from typing import List, Dict
 from dotenv import load_dotenv
 from langchain_groq import ChatGroq
@@ -13,6 +15,8 @@ from langchain_core.messages import HumanMessage, AIMessage
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # System prompt for the AI assistant
 SYSTEM_PROMPT = """You are BOT GPT, a helpful and knowledgeable AI assistant. 
 You provide clear, accurate, and helpful responses to user questions.
@@ -20,9 +24,18 @@ You are friendly but professional, and you aim to be concise while being thoroug
 If you don't know something, you say so honestly.
 Do not use asterisks, bold formatting, or markdown. Keep responses plain text."""
 
+# Prompt template with system message and chat history (stateless, built once)
+PROMPT = ChatPromptTemplate.from_messages([
+    ("system", SYSTEM_PROMPT),
+    MessagesPlaceholder(variable_name="chat_history"),
+    ("human", "{input}")
+])
+
+
 # Initialize ChatGroq with llama3-70b-8192 model
+@lru_cache(maxsize=1)
 def get_llm():
-    """Get the ChatGroq LLM instance."""
+    """Get the shared ChatGroq LLM instance (created on first use)."""
     api_key = os.getenv("GROQ_API_KEY")
     if not api_key:
         raise ValueError("GROQ_API_KEY environment variable is not set")
@@ -35,13 +48,10 @@ def get_llm():
     )
 
 
-def create_sliding_window(k: int = 10):
-    """
-    Create sliding window configuration for keeping last k messages.
-    This implements the sliding window for context management.
-    Returns the window size for use in format_messages_for_memory.
-    """
-    return k
+@lru_cache(maxsize=1)
+def get_chain():
+    """Get the shared prompt | llm chain, reused across requests."""
+    return PROMPT | get_llm()
 
 
 def clean_response(text: str) -> str:
@@ -55,22 +65,19 @@ def clean_response(text: str) -> str:
     return text.strip()
 
 
+# Map stored message roles to LangChain message classes
+MESSAGE_TYPES = {"user": HumanMessage, "assistant": AIMessage}
+
+
 def format_messages_for_memory(messages: List[Dict]) -> List:
     """
     Convert database messages to LangChain message format.
-    Only takes the last 10 messages for context.
+    Callers pass the already-windowed history (last 10 messages).
     """
-    formatted = []
-    # Take only last 10 messages for context window
-    recent_messages = messages[-10:] if len(messages) > 10 else messages
-    
-    for msg in recent_messages:
-        if msg["role"] == "user":
-            formatted.append(HumanMessage(content=msg["content"]))
-        else:
-            formatted.append(AIMessage(content=msg["content"]))
-    
-    return formatted
+    return [
+        MESSAGE_TYPES.get(msg["role"], AIMessage)(content=msg["content"])
+        for msg in messages
+    ]
 
 
 async def generate_response(
@@ -88,20 +95,10 @@ async def generate_response(
         The AI response as a string
     """
     try:
-        llm = get_llm()
-        
-        # Create the prompt template with system message and chat history
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", SYSTEM_PROMPT),
-            MessagesPlaceholder(variable_name="chat_history"),
-            ("human", "{input}")
-        ])
-        
-        # Format the conversation history (last 10 messages only)
+        # Format the conversation history (already windowed by the caller)
         chat_history = format_messages_for_memory(conversation_history)
         
-        # Create the chain
-        chain = prompt | llm
+        chain = get_chain()
         
         # Invoke the chain
         response = await chain.ainvoke({
@@ -112,7 +109,7 @@ async def generate_response(
         return response.content
         
     except Exception as e:
-        print(f"Error generating response: {e}")
+        logger.error("Error generating response: %s", e)
         raise
 
 
@@ -131,20 +128,10 @@ async def stream_response_with_history(
         Individual tokens from the response
     """
     try:
-        llm = get_llm()
-        
-        # Create the prompt template with system message and chat history
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", SYSTEM_PROMPT),
-            MessagesPlaceholder(variable_name="chat_history"),
-            ("human", "{input}")
-        ])
-        
-        # Format the conversation history (last 10 messages only)
+        # Format the conversation history (already windowed by the caller)
         chat_history = format_messages_for_memory(conversation_history)
         
-        # Create the chain
-        chain = prompt | llm
+        chain = get_chain()
         
         # Stream the response
         async for chunk in chain.astream({
@@ -155,7 +142,7 @@ async def stream_response_with_history(
                 yield chunk.content
         
     except Exception as e:
-        print(f"Error streaming response: {e}")
+        logger.error("Error streaming response: %s", e)
         raise
 
 
@@ -167,21 +154,10 @@ def generate_response_sync(
     Synchronous version of generate_response for non-async contexts.
     """
     try:
-        llm = get_llm()
-        
-        # Create the prompt template
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", SYSTEM_PROMPT),
-            MessagesPlaceholder(variable_name="chat_history"),
-            ("human", "{input}")
-        ])
-        
-        # Format history (last 10 messages only - sliding window)
+        # Format history (already windowed by the caller)
         chat_history = format_messages_for_memory(conversation_history)
         
-        # Create and invoke chain
-        chain = prompt | llm
-        response = chain.invoke({
+        response = get_chain().invoke({
             "chat_history": chat_history,
             "input": user_message
         })
@@ -189,5 +165,5 @@ def generate_response_sync(
         return response.content
         
     except Exception as e:
-        print(f"Error generating response: {e}")
+        logger.error("Error generating response: %s", e)
         raise
@@ -5,6 +5,7 @@ A conversational AI backend using LangChain, LangGraph, and GROQ.
 
 import os
 import json
+import logging
 from typing import Optional, List
 from datetime import datetime
 from contextlib import asynccontextmanager
@@ -15,19 +16,30 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 
+# Load environment variables
+load_dotenv()
+
+# Configure logging before importing modules that log at import time (database
+# setup runs on import). Set LOG_LEVEL=DEBUG for per-request workflow traces.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "WARNING").upper()
+logging.basicConfig(
+    level=LOG_LEVEL if LOG_LEVEL in logging.getLevelNamesMapping() else logging.WARNING,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
+if LOG_LEVEL not in logging.getLevelNamesMapping():
+    logger.warning("Invalid LOG_LEVEL %r, using WARNING", LOG_LEVEL)
+
 from database import (
-    SessionLocal, create_tables,
-    get_user_by_email, create_user,
-    get_conversation, get_user_conversations, create_conversation, delete_conversation,
-    get_messages, create_message, update_conversation_title
+    SessionLocal, engine, create_tables, analyze_database,
+    get_or_create_user,
+    get_conversation, get_user_conversation_summaries, create_conversation, delete_conversation,
+    get_messages, create_messages_bulk
 )
 from graph_workflow import run_conversation_workflow
 
-# Load environment variables
-load_dotenv()
-
-# Demo user ID (no auth for simplicity)
-DEMO_USER_ID = 1
+# Demo user (no auth for simplicity)
+DEMO_USER_EMAIL = "demo@botgpt.ai"
 
 
 # Pydantic models for request/response
@@ -36,7 +48,7 @@ class MessageRequest(BaseModel):
 
 
 class ConversationCreate(BaseModel):
-    user_id: Optional[int] = DEMO_USER_ID
+    user_id: Optional[int] = None  # Ignored: conversations belong to the demo user
     message: str
     mode: str = "open"
 
@@ -47,7 +59,7 @@ class ConversationResponse(BaseModel):
 
 
 class MessageResponse(BaseModel):
-    id: str
+    id: int
     conversation_id: str
     role: str
     content: str
@@ -84,26 +96,42 @@ def get_db():
         db.close()
 
 
+def get_demo_user_id(db: Session) -> int:
+    """
+    Get the demo user ID cached by the lifespan.
+    Resolves and caches it on first use if the lifespan did not run.
+    """
+    user_id = getattr(app.state, "demo_user_id", None)
+    if user_id is None:
+        user_id = app.state.demo_user_id = get_or_create_user(db, DEMO_USER_EMAIL).id
+    return user_id
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize database and demo user on startup."""
-    print("Starting BOT GPT API...")
+    logger.info("Starting BOT GPT API...")
     create_tables()
     
-    # Create demo user if not exists
+    # Create demo user if not exists and cache its ID for request handlers
+    app.state.demo_user_id = None
     db = SessionLocal()
     try:
-        user = get_user_by_email(db, "demo@botgpt.ai")
-        if not user:
-            create_user(db, "demo@botgpt.ai")
-            print("Created demo user: demo@botgpt.ai")
-        else:
-            print("Demo user already exists")
+        get_demo_user_id(db)
+        logger.info("Demo user ready: %s", DEMO_USER_EMAIL)
     finally:
         db.close()
     
     yield
-    print("Shutting down BOT GPT API...")
+    logger.info("Shutting down BOT GPT API...")
+    
+    # Refresh planner statistics, then close pooled connections (runs PRAGMA optimize)
+    try:
+        analyze_database()
+    except Exception as e:
+        logger.warning("ANALYZE failed: %s", e)
+    finally:
+        engine.dispose()
 
 
 # Create FastAPI app
@@ -135,10 +163,7 @@ async def health_check():
 @app.post("/api/init")
 async def init_user(db: Session = Depends(get_db)):
     """Initialize or get the demo user."""
-    user = get_user_by_email(db, "demo@botgpt.ai")
-    if not user:
-        user = create_user(db, "demo@botgpt.ai")
-    return {"user": {"id": user.id, "email": user.email}}
+    return {"user": {"id": get_demo_user_id(db), "email": DEMO_USER_EMAIL}}
 
 
 # Create new conversation with first message
@@ -153,11 +178,11 @@ async def create_new_conversation(
     """
     try:
         # Create the conversation
-        conv = create_conversation(db, user_id=DEMO_USER_ID, mode=request.mode)
-        print(f"Created conversation: {conv.id}")
+        conv = create_conversation(db, user_id=get_demo_user_id(db), mode=request.mode)
+        logger.debug("Created conversation: %s", conv.id)
         
         # Run the conversation workflow (process, call LLM, save)
-        response = run_conversation_workflow(
+        result = run_conversation_workflow(
             db=db,
             conversation_id=conv.id,
             user_message=request.message
@@ -165,47 +190,36 @@ async def create_new_conversation(
         
         return {
             "conversation_id": conv.id,
-            "response": response
+            "response": result["response"]
         }
         
     except Exception as e:
-        print(f"Error creating conversation: {e}")
+        logger.error("Error creating conversation: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # List all conversations for a user
 @app.get("/conversations")
 async def list_conversations(
-    user_id: int = DEMO_USER_ID,
+    user_id: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
-    """Get all conversations for a user."""
-    convs = get_user_conversations(db, user_id)
-    
-    result = []
-    for conv in convs:
-        messages = get_messages(db, conv.id)
-        result.append({
-            "id": conv.id,
-            "user_id": conv.user_id,
-            "mode": conv.mode,
-            "title": conv.title,
-            "created_at": conv.created_at.isoformat(),
-            "updated_at": conv.updated_at.isoformat(),
-            "messages": [
-                {
-                    "id": msg.id,
-                    "conversation_id": msg.conversation_id,
-                    "role": msg.role,
-                    "content": msg.content,
-                    "tokens_used": msg.tokens_used,
-                    "timestamp": msg.timestamp.isoformat()
-                }
-                for msg in messages
-            ]
-        })
+    """
+    Get sidebar summaries of a user's conversations (defaults to the demo user).
+    Messages are not included; fetch them via GET /conversations/{id}.
+    """
+    if user_id is None:
+        user_id = get_demo_user_id(db)
     
-    return result
+    return [
+        {
+            "id": conv_id,
+            "title": title,
+            "mode": mode,
+            "updated_at": updated_at.isoformat()
+        }
+        for conv_id, title, mode, updated_at in get_user_conversation_summaries(db, user_id)
+    ]
 
 
 # Get single conversation with all messages
@@ -259,40 +273,38 @@ async def add_message(
         raise HTTPException(status_code=404, detail="Conversation not found")
     
     try:
-        # Run the conversation workflow
-        response = run_conversation_workflow(
+        # Run the conversation workflow (returns the saved messages' IDs and timestamps)
+        result = run_conversation_workflow(
             db=db,
             conversation_id=conversation_id,
             user_message=request.message
         )
-        
-        # Get the saved messages
-        messages = get_messages(db, conversation_id)
-        user_msg = messages[-2] if len(messages) >= 2 else None
-        ai_msg = messages[-1] if len(messages) >= 1 else None
+        response = result["response"]
+        user_msg = result["user_msg"]
+        ai_msg = result["ai_msg"]
         
         return {
             "response": response,
             "userMessage": {
-                "id": user_msg.id if user_msg else None,
+                "id": user_msg["id"] if user_msg else None,
                 "conversation_id": conversation_id,
                 "role": "user",
                 "content": request.message,
                 "tokens_used": 0,
-                "timestamp": user_msg.timestamp.isoformat() if user_msg else None
+                "timestamp": user_msg["timestamp"].isoformat() if user_msg else None
             },
             "aiMessage": {
-                "id": ai_msg.id if ai_msg else None,
+                "id": ai_msg["id"] if ai_msg else None,
                 "conversation_id": conversation_id,
                 "role": "assistant",
                 "content": response,
                 "tokens_used": 0,
-                "timestamp": ai_msg.timestamp.isoformat() if ai_msg else None
+                "timestamp": ai_msg["timestamp"].isoformat() if ai_msg else None
             }
         }
         
     except Exception as e:
-        print(f"Error adding message: {e}")
+        logger.error("Error adding message: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -315,34 +327,45 @@ async def add_message_stream(
         raise HTTPException(status_code=404, detail="Conversation not found")
     
     try:
-        # Save user message to DB
-        create_message(db, conversation_id, "user", request.message)
-        
-        # Get conversation history (excluding the user message we just added)
-        messages = get_messages(db, conversation_id)
-        history = [{"role": msg.role, "content": msg.content} for msg in messages[:-1]]
+        # Get recent conversation history (sliding window of last 10 messages)
+        messages = get_messages(db, conversation_id, limit=10)
+        history = [{"role": msg.role, "content": msg.content} for msg in messages]
         
         # Stream the response
-        full_response = ""
         async def event_generator():
-            nonlocal full_response
+            tokens = []
+            saved = False
             try:
                 async for token in stream_response_with_history(request.message, history):
-                    full_response += token
+                    tokens.append(token)
                     yield f"data: {json.dumps({'token': token})}\n\n"
                 
-                # Save the AI response
-                create_message(db, conversation_id, "assistant", full_response)
+                # Save the user message and AI response in one transaction
+                create_messages_bulk(db, conversation_id, [
+                    ("user", request.message),
+                    ("assistant", "".join(tokens))
+                ])
+                saved = True
                 yield "data: [DONE]\n\n"
                 
             except Exception as e:
-                print(f"Stream error: {e}")
+                logger.error("Stream error: %s", e)
                 yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            
+            finally:
+                # LLM error or client disconnect (GeneratorExit): keep the user's turn
+                if not saved:
+                    logger.warning("Stream for conversation %s ended early, saving user message only", conversation_id)
+                    try:
+                        db.rollback()  # Clear any failed transaction from the full save
+                        create_messages_bulk(db, conversation_id, [("user", request.message)])
+                    except Exception as e:
+                        logger.error("Failed to save user message: %s", e)
         
         return StreamingResponse(event_generator(), media_type="text/event-stream")
         
     except Exception as e:
-        print(f"Error streaming message: {e}")
+        logger.error("Error streaming message: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -36,11 +36,11 @@ import {
   DialogTitle,
   DialogTrigger,
 } from "@/components/ui/dialog";
-import { Conversation } from "@/lib/mockData";
+import { ChatConversation } from "@/lib/mockData";
 
 interface AppSidebarProps {
   currentConversationId?: string;
-  conversations: Conversation[];
+  conversations: ChatConversation[];
   onSelectConversation: (id: string) => void;
   onNewChat: () => void;
   onDeleteConversation: (id: string) => void;
@@ -57,9 +57,9 @@ export function AppSidebar({
   const [searchQuery, setSearchQuery] = useState("");
   const [settingsOpen, setSettingsOpen] = useState(false);
 
+  // Search matches titles only: the list endpoint does not return message content
   const filteredConversations = conversations.filter(c => 
-    c.title?.toLowerCase().includes(searchQuery.toLowerCase()) || 
-    c.messages.some(m => m.content.toLowerCase().includes(searchQuery.toLowerCase()))
+    c.title?.toLowerCase().includes(searchQuery.toLowerCase())
   );
 
   return (
@@ -1,4 +1,4 @@
-import { Conversation, Message } from "./mockData";
+import { ChatConversation, Conversation, ConversationSummary, Message } from "./mockData";
 
 const API_BASE = "/api";
 
@@ -7,10 +7,12 @@ export async function initUser() {
   return res.json();
 }
 
-export async function listConversations(): Promise<Conversation[]> {
+export async function listConversations(): Promise<ChatConversation[]> {
   const res = await fetch(`${API_BASE}/conversations`);
   if (!res.ok) throw new Error("Failed to fetch conversations");
-  return res.json();
+  // The list endpoint returns sidebar fields only; messages are loaded per conversation
+  const summaries: ConversationSummary[] = await res.json();
+  return summaries.map(c => ({ ...c, messages: [] }));
 }
 
 export async function getConversation(id: string): Promise<Conversation> {
@@ -2,7 +2,7 @@
 import { addMinutes, subDays, subHours } from "date-fns";
 
 export interface Message {
-  id: string;
+  id: string | number; // Integer from the backend, UUID for optimistic UI messages
   conversation_id: string;
   role: "user" | "assistant";
   content: string;
@@ -20,6 +20,12 @@ export interface Conversation {
   title?: string; // For UI display
 }
 
+// Sidebar fields returned by GET /conversations (no messages)
+export type ConversationSummary = Pick<Conversation, "id" | "mode" | "updated_at" | "title">;
+
+// A conversation as held by the chat page: summary fields plus any loaded messages
+export type ChatConversation = ConversationSummary & { messages: Message[] };
+
 export interface User {
   id: number;
   email: string;
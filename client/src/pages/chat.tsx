@@ -1,17 +1,44 @@
 import { useState, useEffect } from "react";
 import { AppSidebar } from "@/components/layout/AppSidebar";
 import { ChatArea } from "@/components/layout/ChatArea";
-import { Conversation, Message } from "@/lib/mockData";
+import { ChatConversation, Message } from "@/lib/mockData";
 import { useToast } from "@/hooks/use-toast";
 import * as api from "@/lib/api";
 
 export default function ChatPage() {
-  const [conversations, setConversations] = useState<Conversation[]>([]);
+  const [conversations, setConversations] = useState<ChatConversation[]>([]);
   const [activeId, setActiveId] = useState<string>("");
   const [isTyping, setIsTyping] = useState(false);
   const [isLoading, setIsLoading] = useState(true);
   const { toast } = useToast();
 
+  // Append messages whose IDs are not already present
+  const mergeMessages = (base: Message[], extra: Message[]) => {
+    const ids = new Set(base.map(m => m.id));
+    return [...base, ...extra.filter(m => !ids.has(m.id))];
+  };
+
+  // Load the full message history for a conversation, keeping any
+  // messages sent locally that the server response does not include yet
+  const loadConversation = async (id: string) => {
+    try {
+      const full = await api.getConversation(id);
+      setConversations(prev =>
+        prev.map(c =>
+          c.id === id
+            ? { ...c, ...full, messages: mergeMessages(full.messages, c.messages) }
+            : c
+        )
+      );
+    } catch (error) {
+      toast({
+        title: "Error",
+        description: "Failed to load conversation",
+        variant: "destructive",
+      });
+    }
+  };
+
   // Load initial data
   useEffect(() => {
     const loadData = async () => {
@@ -21,6 +48,7 @@ export default function ChatPage() {
         setConversations(convs);
         if (convs.length > 0) {
           setActiveId(convs[0].id);
+          await loadConversation(convs[0].id);
         } else {
           // Create initial conversation if none exist
           const newConv = await api.createConversation("open");
@@ -44,6 +72,7 @@ export default function ChatPage() {
 
   const handleSelectConversation = (id: string) => {
     setActiveId(id);
+    loadConversation(id);
   };
 
   const handleNewChat = async () => {
@@ -109,12 +138,20 @@ export default function ChatPage() {
       );
 
       // Send message and get AI response
-      const { aiMessage } = await api.sendMessage(activeConversation.id, content);
+      const { userMessage: savedUserMessage, aiMessage } = await api.sendMessage(activeConversation.id, content);
       
+      // Replace the optimistic user message with the saved one
       setConversations(prev =>
         prev.map(c =>
           c.id === activeId
-            ? { ...c, messages: [...c.messages, aiMessage], mode }
+            ? {
+                ...c,
+                messages: mergeMessages(
+                  c.messages.filter(m => m.id !== userMessage.id),
+                  [savedUserMessage, aiMessage]
+                ),
+                mode
+              }
             : c
         )
       );